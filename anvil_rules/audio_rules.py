@@ -23,18 +23,28 @@ import anvil.util
 from anvil.util import ensure_forwardslashes
 
 
+_soundbank_template_paths = None
+
 def _get_soundbank_template_paths():
-  template_path = os.path.join(anvil.util.get_script_path(), 'templates')
-  json_template = os.path.join(template_path, 'soundbank_json.mako')
-  js_template = os.path.join(template_path, 'soundbank_js.mako')
-  return (json_template, js_template)
+  global _soundbank_template_paths
+  if not _soundbank_template_paths:
+    template_path = os.path.join(anvil.util.get_script_path(), 'templates')
+    json_template = os.path.join(template_path, 'soundbank_json.mako')
+    js_template = os.path.join(template_path, 'soundbank_js.mako')
+    _soundbank_template_paths = (json_template, js_template)
+  return _soundbank_template_paths
+
 
+_tracklist_template_paths = None
 
 def _get_tracklist_template_paths():
-  template_path = os.path.join(anvil.util.get_script_path(), 'templates')
-  json_template = os.path.join(template_path, 'tracklist_json.mako')
-  js_template = os.path.join(template_path, 'tracklist_js.mako')
-  return (json_template, js_template)
+  global _tracklist_template_paths
+  if not _tracklist_template_paths:
+    template_path = os.path.join(anvil.util.get_script_path(), 'templates')
+    json_template = os.path.join(template_path, 'tracklist_json.mako')
+    js_template = os.path.join(template_path, 'tracklist_js.mako')
+    _tracklist_template_paths = (json_template, js_template)
+  return _tracklist_template_paths
 
 
 _MIME_EXTS = {
@@ -44,6 +54,20 @@ _MIME_EXTS = {
     'audio/ogg': '.ogg',
     }
 
+# TODO(benvanik) proper mime type
+_EXT_MIME_TYPES = {
+    '.mp3': 'audio/mpeg',
+    '.ogg': 'audio/ogg',
+    '.wav': 'audio/wav',
+    '.m4a': 'audio/mp4',
+    }
+
+# Matches a cue name, with any variant identifier (-#) in group 2
+_CUE_NAME_RE = re.compile('([a-zA-Z0-9_]+)(\-[0-9]+)?')
+
+# Number of frames to move per read when merging waves
+_MERGE_CHUNK_FRAMES = 64 * 1024
+
 
 class DataSource(object):
   pass
@@ -169,9 +193,10 @@ class AudioSoundbankRule(Rule):
       js_path = self._get_gen_path(suffix='.js')
       json_path = self._get_out_path(suffix='.json')
       wav_path = self._get_out_path(suffix='.wav')
-      self._ensure_output_exists(os.path.dirname(js_path))
-      self._ensure_output_exists(os.path.dirname(json_path))
-      self._ensure_output_exists(os.path.dirname(wav_path))
+      for dir_path in set([os.path.dirname(js_path),
+                           os.path.dirname(json_path),
+                           os.path.dirname(wav_path)]):
+        self._ensure_output_exists(dir_path)
       self._append_output_paths([js_path, json_path, wav_path])
 
       base_path = os.path.relpath(self._get_rule_path(),
@@ -196,6 +221,7 @@ class AudioSoundbankRule(Rule):
 
       def _callback_post_convert(results):
         # Add sources for all converted files
+        fmt_paths = []
         for i, conversion in enumerate(conversions):
           if results[i][0]:
             (format, fmt_path) = conversion
@@ -204,7 +230,8 @@ class AudioSoundbankRule(Rule):
             source.path = ensure_forwardslashes(os.path.basename(fmt_path))
             source.size = os.path.getsize(fmt_path)
             sound_bank.data_sources.append(source)
-            self._append_output_paths([fmt_path])
+            fmt_paths.append(fmt_path)
+        self._append_output_paths(fmt_paths)
 
         # Template the results
         ds = []
@@ -233,8 +260,9 @@ class AudioSoundbankRule(Rule):
 
         # Convert wav to self.formats
         dc = []
+        wav_base_path = os.path.splitext(wav_path)[0]
         for i, format in enumerate(self.rule.formats):
-          fmt_path = os.path.splitext(wav_path)[0] + _MIME_EXTS[format]
+          fmt_path = wav_base_path + _MIME_EXTS[format]
           d = self._encode_audio_file(wav_path, fmt_path, format)
           if d:
             conversions.append((format, fmt_path))
@@ -294,7 +322,7 @@ class _MergeWavesTask(Task):
       for src_path in self.src_paths:
         # Get the cue name - this removes any variant identifier at the end
         (cue_name, ext) = os.path.splitext(os.path.basename(src_path))
-        cue_name_match = re.search('([a-zA-Z0-9_]+)(\-[0-9]+)?', cue_name)
+        cue_name_match = _CUE_NAME_RE.search(cue_name)
         cue_name = cue_name_match.group(1)
 
         # Create the cue (or find an existing, if we are adding a variant)
@@ -325,9 +353,9 @@ class _MergeWavesTask(Task):
           out_wav.setframerate(src_wav.getframerate())
           silence_frame_count = silence_duration * src_wav.getframerate() / 1000
           silence_frame_size = src_wav.getnchannels() * src_wav.getsampwidth()
-          silence_frames = bytearray()
-          for n in range(0, silence_frame_count * silence_frame_size):
-            silence_frames.append(0)
+          # Allocate the zeroed buffer in one shot - it gets reused for the
+          # padding between every cue
+          silence_frames = bytearray(silence_frame_count * silence_frame_size)
         else:
           # Ensure this wav matches our target
           if (src_wav.getnchannels() != out_wav.getnchannels() or
@@ -336,13 +364,19 @@ class _MergeWavesTask(Task):
             raise Exception(
                 'Source wave %s does not match target wave options' % (src_path))
 
-        # Write the wav in
-        source_frames = src_wav.readframes(src_wav.getnframes())
-        out_wav.writeframes(source_frames)
+        # Write the wav in, streaming a bounded number of frames at a time
+        # instead of pulling the entire source file into memory
+        # writeframesraw skips the per-call header patch (a seek to the start
+        # of the file and back) - close() fixes the header up once at the end
+        remaining = src_wav.getnframes()
+        while remaining > 0:
+          frame_count = min(remaining, _MERGE_CHUNK_FRAMES)
+          out_wav.writeframesraw(src_wav.readframes(frame_count))
+          remaining -= frame_count
         target_duration += cue_duration
 
         # Add padding
-        out_wav.writeframes(silence_frames)
+        out_wav.writeframesraw(silence_frames)
         target_duration += silence_duration
 
         # Add variant
@@ -415,8 +449,9 @@ class AudioTrackListRule(Rule):
 
       js_path = self._get_gen_path(suffix='.js')
       json_path = self._get_out_path(suffix='.json')
-      self._ensure_output_exists(os.path.dirname(js_path))
-      self._ensure_output_exists(os.path.dirname(json_path))
+      for dir_path in set([os.path.dirname(js_path),
+                           os.path.dirname(json_path)]):
+        self._ensure_output_exists(dir_path)
       self._append_output_paths([js_path, json_path])
 
       base_path = os.path.relpath(self._get_rule_path(),
@@ -433,19 +468,14 @@ class AudioTrackListRule(Rule):
       track_list.tracks = []
 
       # TODO(benvanik): convert/etc to self.formats
+      self._append_output_paths(list(self.src_paths))
       for src_path in self.src_paths:
-        self._append_output_paths([src_path])
+        (track_name, src_ext) = os.path.splitext(os.path.basename(src_path))
         track = Track()
-        track.name = os.path.splitext(os.path.basename(src_path))[0]
+        track.name = track_name
         track.duration = self._get_duration(src_path)
         track.data_sources = []
-        # TODO(benvanik) proper mime type
-        mime_type = {
-            '.mp3': 'audio/mpeg',
-            '.ogg': 'audio/ogg',
-            '.wav': 'audio/wav',
-            '.m4a': 'audio/mp4',
-            }[os.path.splitext(src_path)[1]]
+        mime_type = _EXT_MIME_TYPES[src_ext]
         source = DataSource()
         source.type = mime_type
         source.path = ensure_forwardslashes(os.path.relpath(src_path,
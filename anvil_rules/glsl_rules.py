@@ -18,11 +18,16 @@ from anvil.task import Task, NodeExecutableTask
 import anvil.util
 
 
+_template_paths = None
+
 def _get_template_paths():
-  template_path = os.path.join(anvil.util.get_script_path(), 'templates')
-  json_template = os.path.join(template_path, 'glsl_json.mustache')
-  js_template = os.path.join(template_path, 'glsl_js.mustache')
-  return (json_template, js_template)
+  global _template_paths
+  if not _template_paths:
+    template_path = os.path.join(anvil.util.get_script_path(), 'templates')
+    json_template = os.path.join(template_path, 'glsl_json.mustache')
+    js_template = os.path.join(template_path, 'glsl_js.mustache')
+    _template_paths = (json_template, js_template)
+  return _template_paths
 
 
 @build_rule('compile_glsl')
@@ -87,16 +92,26 @@ class CompileGlslRule(Rule):
       #                              os.path.dirname(self.source_paths[0]))
       #   call_args.append('--glsl_include_prefix=%s' % (rel_path))
 
-      ds = []
+      # Compute all output paths and batch the directory creation before any
+      # compilations are kicked off
+      file_sets = []
+      output_paths = []
+      output_dirs = set()
       for src_path in self.src_paths:
         json_path = os.path.splitext(self._get_out_path_for_src(src_path))[0]
         json_path += '.json'
         js_path = os.path.splitext(self._get_gen_path_for_src(src_path))[0]
         js_path += '.js'
-        self._ensure_output_exists(os.path.dirname(json_path))
-        self._ensure_output_exists(os.path.dirname(js_path))
-        self._append_output_paths([json_path, js_path])
+        file_sets.append((src_path, json_path, js_path))
+        output_dirs.add(os.path.dirname(json_path))
+        output_dirs.add(os.path.dirname(js_path))
+        output_paths.extend([json_path, js_path])
+      for dir_path in output_dirs:
+        self._ensure_output_exists(dir_path)
+      self._append_output_paths(output_paths)
 
+      ds = []
+      for (src_path, json_path, js_path) in file_sets:
         # JSON file
         ds.append(self._compile_file(args, src_path, json_path,
                                      json_template))
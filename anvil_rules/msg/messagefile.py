@@ -13,7 +13,6 @@ __author__ = 'benvanik@google.com (Ben Vanik)'
 
 
 import logging
-import os
 
 
 class MessageFile(object):
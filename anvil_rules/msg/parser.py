@@ -8,10 +8,7 @@ __author__ = 'benvanik@google.com (Ben Vanik)'
 
 
 import fileinput
-import logging
-import os
 import re
-import subprocess
 
 import pyPEG
 from pyPEG import keyword, _and, _not, ignore
@@ -19,12 +16,18 @@ from pyPEG import keyword, _and, _not, ignore
 from messagefile import MessageFile
 
 
+# Grammar terminals are compiled once here - the grammar functions are
+# re-invoked constantly while parsing and shouldn't rebuild their regexes
+_comment_regexes = [re.compile(r"//.*"), re.compile("/\*.*?\*/", re.S)]
+_literal_regex = re.compile(r'\d*\.\d*|\d+|".*?"')
+_symbol_regex = re.compile(r'[\.\w]+')
+
 def comment():
-  return [re.compile(r"//.*"), re.compile("/\*.*?\*/", re.S)]
+  return _comment_regexes
 def literal():
-  return re.compile(r'\d*\.\d*|\d+|".*?"')
+  return _literal_regex
 def symbol():
-  return re.compile(r'[\.\w]+')
+  return _symbol_regex
 
 def number_range():
   return '(', literal, ',', literal, 0, (',', literal), ')'
@@ -22,10 +22,15 @@ import anvil.util
 sys.path.append(anvil.util.get_script_path())
 
 
+_template_paths = None
+
 def _get_template_paths():
-  template_path = os.path.join(anvil.util.get_script_path(), 'templates')
-  js_template = os.path.join(template_path, 'msg_js.mako')
-  return (js_template)
+  global _template_paths
+  if not _template_paths:
+    template_path = os.path.join(anvil.util.get_script_path(), 'templates')
+    js_template = os.path.join(template_path, 'msg_js.mako')
+    _template_paths = (js_template)
+  return _template_paths
 
 
 @build_rule('compile_msg')
@@ -57,24 +62,62 @@ class CompileMsgRule(Rule):
     def begin(self):
       super(CompileMsgRule._Context, self).begin()
 
-      import msg.parser
       (js_template) = _get_template_paths()
 
-      ds = []
+      # Compute all output paths and batch the directory creation before any
+      # parse tasks are kicked off
+      file_pairs = []
+      output_dirs = set()
       for src_path in self.src_paths:
         js_path = os.path.splitext(self._get_gen_path_for_src(src_path))[0]
         js_path += '.js'
-        self._ensure_output_exists(os.path.dirname(js_path))
-        self._append_output_paths([js_path])
+        file_pairs.append((src_path, js_path))
+        output_dirs.add(os.path.dirname(js_path))
+      for dir_path in output_dirs:
+        self._ensure_output_exists(dir_path)
+      self._append_output_paths([js_path for (src_path, js_path) in file_pairs])
+
+      # Parse all files in parallel on the task pool, capturing each result
+      # as it lands
+      message_files = {}
+      dp = []
+      for (src_path, js_path) in file_pairs:
+        d = self._run_task_async(_ParseMsgFileTask(
+            self.build_env, src_path))
+        def _callback_post_parse(message_file, src_path=src_path):
+          message_files[src_path] = message_file
+        d.add_callback_fn(_callback_post_parse)
+        dp.append(d)
+
+      def _callback_post_parse_all(results):
+        # Template all parsed files
+        ds = []
+        for (src_path, js_path) in file_pairs:
+          ds.append(self._run_task_async(MakoTemplateTask(
+              self.build_env, js_path, js_template, {
+                  'file': message_files[src_path],
+                  })))
+        self._chain(ds)
+
+      dg = anvil.async.gather_deferreds(dp, errback_if_any_fail=True)
+      dg.add_callback_fn(_callback_post_parse_all)
+      self._chain_errback(dg)
+
+
+class _ParseMsgFileTask(Task):
+  """A task that parses a single message file.
+  """
 
-        # TODO(benvanik): move parsing to another task
-        message_file = msg.parser.parse(src_path)
+  def __init__(self, build_env, src_path, *args, **kwargs):
+    """Initializes a message file parsing task.
 
-        ds.append(self._run_task_async(MakoTemplateTask(
-            self.build_env, js_path, js_template, {
-                'file': message_file,
-                })))
+    Args:
+      build_env: The build environment for state.
+      src_path: Source msg file path.
+    """
+    super(_ParseMsgFileTask, self).__init__(build_env, *args, **kwargs)
+    self.src_path = src_path
 
-      # Kick off optimizations
-      dg = anvil.async.gather_deferreds(ds, errback_if_any_fail=True)
-      self._chain(dg)
+  def execute(self):
+    import msg.parser
+    return msg.parser.parse(self.src_path)
@@ -24,12 +24,25 @@ CHANNELS_A = 0x8
 CHANNELS_RGB = 0x7
 CHANNELS_RGBA = 0xF
 
+# TODO(benvanik) proper mime type
+_MIME_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    }
+
+
+_template_paths = None
 
 def _get_template_paths():
-  template_path = os.path.join(anvil.util.get_script_path(), 'templates')
-  json_template = os.path.join(template_path, 'texture_json.mako')
-  js_template = os.path.join(template_path, 'texture_js.mako')
-  return (json_template, js_template)
+  global _template_paths
+  if not _template_paths:
+    template_path = os.path.join(anvil.util.get_script_path(), 'templates')
+    json_template = os.path.join(template_path, 'texture_json.mako')
+    js_template = os.path.join(template_path, 'texture_js.mako')
+    _template_paths = (json_template, js_template)
+  return _template_paths
 
 
 @build_rule('texture_set')
@@ -74,38 +87,63 @@ class TextureSetRule(Rule):
     def begin(self):
       super(TextureSetRule._Context, self).begin()
 
-      # Nasty, required to work around a bug in PIL when writing JPGs with
-      # optimize and quality over 85
-      import ImageFile
-      ImageFile.MAXBLOCK = 2000000
-
-      ds = []
+      # Compute all output paths and batch the directory creation before any
+      # identification tasks are kicked off
+      file_sets = []
+      output_paths = []
+      output_dirs = set()
       for src_path in self.src_paths:
         json_path = os.path.splitext(self._get_out_path_for_src(src_path))[0]
         json_path += '.json'
         js_path = os.path.splitext(self._get_gen_path_for_src(src_path))[0]
         js_path += '.js'
-        self._ensure_output_exists(os.path.dirname(json_path))
-        self._ensure_output_exists(os.path.dirname(js_path))
-        self._append_output_paths([json_path, js_path])
-
-        ds.extend(self._optimize_image(src_path, json_path, js_path))
-
-      # Kick off optimizations
-      dg = anvil.async.gather_deferreds(ds, errback_if_any_fail=True)
-      self._chain(dg)
-
-    def _optimize_image(self, src_path, json_path, js_path):
-      """Begins tasks to identify, optimize, and write metadata for a single
-      input image.
+        file_sets.append((src_path, json_path, js_path))
+        output_dirs.add(os.path.dirname(json_path))
+        output_dirs.add(os.path.dirname(js_path))
+        output_paths.extend([json_path, js_path])
+      for dir_path in output_dirs:
+        self._ensure_output_exists(dir_path)
+      self._append_output_paths(output_paths)
+
+      # Identify all images in parallel on the task pool, capturing each
+      # result as it lands
+      identify_infos = {}
+      dp = []
+      for (src_path, json_path, js_path) in file_sets:
+        d = self._run_task_async(_IdentifyImageTask(
+            self.build_env, src_path))
+        def _callback_post_identify(identify_info, src_path=src_path):
+          identify_infos[src_path] = identify_info
+        d.add_callback_fn(_callback_post_identify)
+        dp.append(d)
+
+      def _callback_post_identify_all(results):
+        # Template metadata for all identified images
+        ds = []
+        for (src_path, json_path, js_path) in file_sets:
+          (width, height, channels) = identify_infos[src_path]
+          ds.extend(self._write_image_metadata(src_path, json_path, js_path,
+                                               width, height, channels))
+        self._chain(ds)
+
+      dg = anvil.async.gather_deferreds(dp, errback_if_any_fail=True)
+      dg.add_callback_fn(_callback_post_identify_all)
+      self._chain_errback(dg)
+
+    def _write_image_metadata(self, src_path, json_path, js_path,
+        width, height, channels):
+      """Begins tasks to optimize and write metadata for an identified image.
 
       Args:
         src_path: Source path to an image file.
         json_path: JSON file output path.
         js_path: JS file output path.
+        width: Image width.
+        height: Image height.
+        channels: One of the CHANNELS_ enum values.
 
       Returns:
-        A list of Deferreds for all image tasks.
+        A list of Deferreds for the metadata template tasks.
       """
       ds = []
 
@@ -114,16 +152,12 @@ class TextureSetRule(Rule):
       rel_json_path = anvil.util.strip_build_paths(
           os.path.relpath(json_path, self.build_env.root_path))
 
-      # TODO(benvanik): want to split this into tasks:
-      # - IdentifyImageTask: read metadata, decide what to do
+      # TODO(benvanik): want to split the remaining work into tasks:
       # - *ExecutionTask[]: various conversions (if required)
       # - Gather back, write metadata
 
-      # TODO(benvanik): identify in a task
-      (width, height, channels) = self._identify_image(src_path)
-
       # TODO(benvanik): encode? drop invalid name things? (whitespace/etc)
-      class_name = os.path.splitext(os.path.basename(src_path))[0]
+      (class_name, src_ext) = os.path.splitext(os.path.basename(src_path))
 
       # TODO(benvanik): proper image info construction
       class Image(object):
@@ -140,13 +174,7 @@ class TextureSetRule(Rule):
       image.slot_size = \
           self.rule.slot_size.split('x') if self.rule.slot_size else None
 
-      # TODO(benvanik) proper mime type
-      mime_type = {
-          '.png': 'image/png',
-          '.jpg': 'image/jpeg',
-          '.gif': 'image/gif',
-          '.webp': 'image/webp',
-          }[os.path.splitext(src_path)[1]]
+      mime_type = _MIME_TYPES[src_ext]
       class ImageLod(object):
         pass
       lod0 = ImageLod()
@@ -173,29 +201,41 @@ class TextureSetRule(Rule):
               })))
       return ds
 
-    def _identify_image(self, src_path):
-      """Identifies the dimensions/format/size of an image.
 
-      Args:
-        src_path: Image path.
+class _IdentifyImageTask(Task):
+  """A task that identifies the dimensions/format/size of an image.
+  """
 
-      Returns:
-        (width, height, channels), where channels is one of the CHANNELS_ enum
-        values.
-      """
-      import Image
-      ext = os.path.splitext(src_path)[1]
-      if ext in ['.png', '.jpg']:
-        img = Image.open(src_path)
+  def __init__(self, build_env, src_path, *args, **kwargs):
+    """Initializes an image identification task.
+
+    Args:
+      build_env: The build environment for state.
+      src_path: Image path.
+    """
+    super(_IdentifyImageTask, self).__init__(build_env, *args, **kwargs)
+    self.src_path = src_path
+
+  def execute(self):
+    # Nasty, required to work around a bug in PIL when writing JPGs with
+    # optimize and quality over 85
+    import ImageFile
+    ImageFile.MAXBLOCK = 2000000
+
+    import Image
+    src_path = self.src_path
+    ext = os.path.splitext(src_path)[1]
+    if ext in ['.png', '.jpg']:
+      img = Image.open(src_path)
+      channels = CHANNELS_RGB
+      if img.mode == 'RGB':
         channels = CHANNELS_RGB
-        if img.mode == 'RGB':
-          channels = CHANNELS_RGB
-        elif img.mode == 'RGBA' or img.mode == 'P':
-          channels = CHANNELS_RGBA
-        elif img.mode == 'L':
-          channels = CHANNELS_RGBA
-        else:
-          raise Exception('Unknown mode: %s' % (img.mode))
-        return (img.size[0], img.size[1], channels)
-      raise Exception('Unknown extension: %s' % (ext))
+      elif img.mode == 'RGBA' or img.mode == 'P':
+        channels = CHANNELS_RGBA
+      elif img.mode == 'L':
+        channels = CHANNELS_RGBA
+      else:
+        raise Exception('Unknown mode: %s' % (img.mode))
+      return (img.size[0], img.size[1], channels)
+    raise Exception('Unknown extension: %s' % (ext))
 
@@ -61,15 +61,15 @@ class CreateKeyMethod(webapp2.RequestHandler):
                                              private_key=str(uuid.uuid4()))
     server_registration.put()
 
+    # Single buffered write for the whole body
     self.response.out.write('<br/>'.join([
         'Server registered:',
         'UUID: %s' % (cgi.escape(server_registration.uuid)),
         'E-mail: %s' % (cgi.escape(server_registration.email)),
         'Private Key: %s' % (cgi.escape(server_registration.private_key)),
+        '<a href="/admin/"><< Back</a>',
         ]))
 
-    self.response.out.write('<br/><a href="/admin/"><< Back</a>')
-
 
 class DeleteKeyMethod(webapp2.RequestHandler):
   def get(self, uuid):
@@ -85,8 +85,9 @@ class DeleteKeyMethod(webapp2.RequestHandler):
 
     existing_server.delete()
 
-    self.response.out.write('Registration deleted: %s' % (existing_server.uuid))
-    self.response.out.write('<br/><a href="/admin/"><< Back</a>')
+    self.response.out.write(
+        'Registration deleted: %s'
+        '<br/><a href="/admin/"><< Back</a>' % (existing_server.uuid))
 
 
 app = webapp2.WSGIApplication([